@@ -1,16 +1,19 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
+import json
 import os
 import re
 import numpy as np
 import pandas as pd
 
-from dash import Dash, dcc, html, Input, Output
+from dash import Dash, dcc, html, Input, Output, State, ALL, Patch, ctx, no_update
 import dash_bootstrap_components as dbc
 from dash import dash_table
 
-import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 
 
 # =========================
@@ -20,6 +23,16 @@ BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_XLSX = BASE_DIR / "data" / "Base de Dados - 144 Municípios.xlsx"
 XLSX_PATH = Path(os.getenv("XLSX_PATH", str(DEFAULT_XLSX))).expanduser().resolve()
 
+# Cache em disco das abas já tratadas (invalidado quando a planilha muda)
+CACHE_DIR = BASE_DIR / "data" / ".cache"
+CACHE_VERSION = 5  # incrementar sempre que mudar o tratamento/dtypes das abas
+
+# Serialização das respostas (o Dash usa o to_json do plotly): com orjson instalado
+# o modo "auto" passa por uma limpeza recursiva em Python de cada figura (template
+# inclusive) e fica ~2x mais lento que o json da stdlib para figuras pequenas como
+# estas (~5 ms vs ~2,5 ms por resposta de Contas Públicas).
+pio.json.config.default_engine = "json"
+
 MUNICIPAL_IBGE_MIN = 1500000
 MUNICIPAL_IBGE_MAX = 1600000  # exclusivo
 
@@ -38,52 +51,56 @@ BRAND_TEXT = "#0B1320"
 BRAND_MUTED = "#5B6B7C"
 BRAND_BORDER = "#E6ECF5"
 
+# Template da marca, registrado uma vez: as figuras não repetem fundo/fonte/grade,
+# cores (colorway: 1ª série azul, 2ª vermelha), margens nem o estilo das linhas.
+# Parte do plotly_white, mas só com os defaults dos traces usados aqui (bar e
+# scatter) — o template vai dentro de cada figura, e o plotly_white inteiro traz
+# defaults de ~30 tipos de trace que estas telas nunca desenham.
+_PLOTLY_WHITE = pio.templates["plotly_white"]
+pio.templates["pev"] = go.layout.Template(
+    data=dict(bar=_PLOTLY_WHITE.data.bar, scatter=_PLOTLY_WHITE.data.scatter),
+    layout=_PLOTLY_WHITE.layout,
+)
+pio.templates["pev"].layout.update(
+    paper_bgcolor=BRAND_CARD,
+    plot_bgcolor=BRAND_CARD,
+    separators=".,",
+    font=dict(
+        family="system-ui, -apple-system, Segoe UI, Roboto, Ubuntu, Cantarell, Noto Sans, Arial",
+        color=BRAND_TEXT,
+    ),
+    xaxis=dict(showgrid=True, gridcolor=BRAND_BORDER, zeroline=False),
+    yaxis=dict(showgrid=True, gridcolor=BRAND_BORDER, zeroline=False, tickformat=",.0f"),
+    colorway=[BRAND_BLUE, BRAND_RED],
+    margin=dict(l=10, r=10, t=70, b=10),
+)
+pio.templates["pev"].data.scatter[0].update(mode="lines+markers", line_width=3, marker_size=8)
+pio.templates.default = "pev"
+
 
 def display_year(ano_real: int) -> int:
     return int(ano_real) + YEAR_OFFSET
 
 
-def apply_year_ticks(fig, anos_reais: list[int], axis_title: str = ""):
-    """
-    Elimina frações de ano e mostra ANO EXIBIDO (ano real + YEAR_OFFSET) nos eixos,
-    sem explicitar isso na UI.
-    """
-    anos_reais = sorted([int(a) for a in anos_reais if a is not None])
-    fig.update_xaxes(
-        tickmode="array",
-        tickvals=anos_reais,
-        ticktext=[str(display_year(a)) for a in anos_reais],
-        dtick=1,
-        type="linear",
-        title=axis_title,
-        showgrid=True,
-        gridcolor=BRAND_BORDER,
-        zeroline=False,
-    )
-    fig.update_yaxes(
-        showgrid=True,
-        gridcolor=BRAND_BORDER,
-        zeroline=False,
-    )
-    fig.update_layout(
-        template="plotly_white",
-        paper_bgcolor=BRAND_CARD,
-        plot_bgcolor=BRAND_CARD,
-        separators=".,",
-        font=dict(
-            family="system-ui, -apple-system, Segoe UI, Roboto, Ubuntu, Cantarell, Noto Sans, Arial",
-            color=BRAND_TEXT,
-        ),
-    )
-    return fig
-
-
 # =========================
 # Helpers
 # =========================
+# milhar sai como "_" no f-string; uma única passada vira pt-BR (1_234.5 -> 1.234,5)
+_PTBR_TABLE = str.maketrans({"_": ".", ".": ","})
+
+
 def format_ptbr_number(x: float | int, decimals: int = 2) -> str:
-    s = f"{float(x):,.{decimals}f}"
-    return s.replace(",", "X").replace(".", ",").replace("X", ".")
+    return f"{float(x):_.{decimals}f}".translate(_PTBR_TABLE)
+
+
+def to_mi(values) -> np.ndarray:
+    """
+    Valores em R$ -> R$ milhões para as figuras. A conta fica em float32, mas
+    cada número volta como o menor decimal que o representa (356.29373 em vez
+    de 356.2937316894531): o JSON das figuras sai com metade dos dígitos.
+    """
+    mi = np.asarray(values, dtype=np.float32) / np.float32(MONEY_SCALE)
+    return mi.astype(str).astype(np.float64)
 
 
 def format_number_mi(v: float | int | None, decimals: int = 1) -> str:
@@ -92,10 +109,13 @@ def format_number_mi(v: float | int | None, decimals: int = 1) -> str:
     return format_ptbr_number(float(v), decimals=decimals)
 
 
+@lru_cache(maxsize=None)
 def normalize_indicator_label(label: str) -> str:
     """
     Ajustes visuais nos nomes dos indicadores (sem mexer no Excel):
     - Remove 'mil' de 'R$ mil/Hab.' -> 'R$/hab.'
+
+    Memoizada: o conjunto de colunas é fixo, então as regex rodam uma vez por nome.
     """
     s = str(label or "").strip()
 
@@ -115,6 +135,34 @@ def normalize_indicator_label(label: str) -> str:
     return s
 
 
+FMT_MONEY, FMT_PERCENT, FMT_PLAIN = range(3)
+
+
+@lru_cache(maxsize=None)
+def format_code(indicador: str) -> int:
+    """Decide pelo nome do indicador (uma vez por nome) como formatar números."""
+    ind = indicador or ""
+    ind_upper = ind.upper()
+    if "R$" in ind_upper:
+        return FMT_MONEY
+    if "PERCENT" in ind_upper or "%" in ind:
+        return FMT_PERCENT
+    return FMT_PLAIN
+
+
+def _format_plain(v: float | int) -> str:
+    if float(v).is_integer():
+        return f"{int(v):_}".translate(_PTBR_TABLE)
+    return format_ptbr_number(v)
+
+
+_FMT_FUNCS = (
+    lambda v: f"R$\u00A0{format_ptbr_number(v)}",  # NBSP para nunca quebrar "R$" do número
+    lambda v: f"{format_ptbr_number(v)}%",
+    _format_plain,
+)
+
+
 def format_value(indicador: str, v) -> str:
     if v is None or (isinstance(v, float) and np.isnan(v)):
         return "—"
@@ -126,18 +174,7 @@ def format_value(indicador: str, v) -> str:
         v = v.item()
 
     if isinstance(v, (int, float)):
-        ind_upper = (indicador or "").upper()
-
-        # NBSP para nunca quebrar "R$" do número
-        if "R$" in ind_upper:
-            return f"R$\u00A0{format_ptbr_number(v)}"
-
-        if "PERCENT" in ind_upper or "%" in indicador:
-            return f"{format_ptbr_number(v)}%"
-
-        if float(v).is_integer():
-            return f"{int(v):,}".replace(",", ".")
-        return format_ptbr_number(v)
+        return _FMT_FUNCS[format_code(indicador)](v)
 
     return str(v)
 
@@ -146,59 +183,87 @@ def only_municipios_from_indicador_sheet(df: pd.DataFrame) -> pd.DataFrame:
     if "Código IBGE" not in df.columns or "Indicador" not in df.columns:
         return df.copy()
 
-    ibge = pd.to_numeric(df["Código IBGE"], errors="coerce")
-    ibge_int = ibge.fillna(0).astype(int)
-
-    nome = df["Indicador"].astype(str).str.strip()
-    is_para = nome.str.upper().isin(["PARÁ", "PARA"])
-    is_ri = nome.str.upper().str.startswith("RI ")
+    # IBGE cabe em int32 (7 dígitos)
+    ibge_int = pd.to_numeric(df["Código IBGE"], errors="coerce").fillna(0).astype(np.int32)
+    nome_u = df["Indicador"].astype(str).str.strip().str.upper()
 
-    is_muni = (ibge_int >= MUNICIPAL_IBGE_MIN) & (ibge_int < MUNICIPAL_IBGE_MAX)
+    mask = (
+        (ibge_int >= MUNICIPAL_IBGE_MIN)
+        & (ibge_int < MUNICIPAL_IBGE_MAX)
+        & ~nome_u.isin(("PARÁ", "PARA"))
+        & ~nome_u.str.startswith("RI ")
+    )
 
-    out = df[is_muni & (~is_para) & (~is_ri)].copy()
-    out["Código IBGE"] = ibge_int[is_muni & (~is_para) & (~is_ri)]
+    # take() já devolve um frame novo (sem o .copy() extra da seleção por máscara)
+    rows = np.flatnonzero(mask.to_numpy())
+    out = df.take(rows)
+    out["Código IBGE"] = ibge_int.to_numpy()[rows]
     return out
 
 
 def only_municipios_from_nome_municipio_sheet(df: pd.DataFrame) -> pd.DataFrame:
     if "Código IBGE" not in df.columns:
         return df.copy()
-    ibge = pd.to_numeric(df["Código IBGE"], errors="coerce").fillna(0).astype(int)
+    ibge = pd.to_numeric(df["Código IBGE"], errors="coerce").fillna(0).astype(np.int32)
     is_muni = (ibge >= MUNICIPAL_IBGE_MIN) & (ibge < MUNICIPAL_IBGE_MAX)
-    out = df[is_muni].copy()
-    out["Código IBGE"] = ibge[is_muni]
+    rows = np.flatnonzero(is_muni.to_numpy())
+    out = df.take(rows)
+    out["Código IBGE"] = ibge.to_numpy()[rows]
     return out
 
 
-def wide_to_kv(df: pd.DataFrame, municipio: str, nome_col: str) -> pd.DataFrame:
-    row = df.loc[df[nome_col] == municipio]
-    if row.empty:
-        return pd.DataFrame([{"Indicador": "—", "Valor": "Município não encontrado nessa aba"}])
+KV_DROP_COLS = ["Código IBGE", "IBGE", "Indicador", "Nome_Município"]
+
+
+def format_column(col, s: pd.Series) -> list[str]:
+    """
+    Formata uma coluna inteira de uma vez: o formato (R$, %, número) e o tipo
+    são decididos uma vez por coluna, não a cada célula.
+    """
+    label = normalize_indicator_label(str(col))
+    if pd.api.types.is_bool_dtype(s) or not pd.api.types.is_numeric_dtype(s):
+        return [format_value(label, v) for v in s.tolist()]
+
+    fmt = _FMT_FUNCS[format_code(label)]
+    return ["—" if np.isnan(v) else fmt(v) for v in s.to_numpy(dtype=float).tolist()]
+
 
-    row = row.iloc[0].to_dict()
+def format_sheet(df: pd.DataFrame) -> pd.DataFrame:
+    """Aba já formatada para exibição (strings), sem as colunas de metadados."""
+    df = df.drop(columns=KV_DROP_COLS, errors="ignore")
+    return pd.DataFrame({c: format_column(c, df[c]) for c in df.columns}, index=df.index)
 
-    for k in list(row.keys()):
-        if k in ["Código IBGE", "IBGE", "R. Integ.", "Indicador", "Nome_Município"]:
-            row.pop(k, None)
 
-    items = []
-    for k, v in row.items():
-        k2 = normalize_indicator_label(str(k))
-        items.append({"Indicador": k2, "Valor": format_value(k2, v)})
+KV_NOT_FOUND = [{"Indicador": "—", "Valor": "Município não encontrado nessa aba"}]
 
-    return pd.DataFrame(items)
+
+def index_by_municipio(df_fmt: pd.DataFrame, nome_col: str) -> pd.DataFrame:
+    """Aba formatada indexada pelo nome do município (fica a primeira linha de cada um)."""
+    df_fmt = df_fmt.set_index(df_fmt[nome_col].rename(None))
+    return df_fmt[~df_fmt.index.duplicated()]
+
+
+def build_kv_records(df_idx: pd.DataFrame) -> dict[str, list[dict]]:
+    """
+    Registros prontos da tabela (Indicador/Valor) para cada município da aba
+    (`df_idx` vem de index_by_municipio), numa passada só.
+    """
+    labels = [normalize_indicator_label(str(k)) for k in df_idx.columns]
+    return {
+        nome: [{"Indicador": k, "Valor": v} for k, v in zip(labels, row)]
+        for nome, *row in df_idx.itertuples(name=None)
+    }
 
 
 def melt_years(df: pd.DataFrame, value_name: str) -> pd.DataFrame:
-    df = df.copy()
-    df = df.loc[:, [c for c in df.columns if not (isinstance(c, str) and c.startswith("Unnamed"))]]
+    # colunas 'Unnamed: N' já são descartadas na leitura (usecols=is_used_column)
     df = only_municipios_from_nome_municipio_sheet(df)
 
     year_cols = [c for c in df.columns if isinstance(c, (int, np.integer))]
     year_cols = sorted(year_cols)
 
     base_cols = []
-    for c in ["Código IBGE", "Nome_Município"]:
+    for c in ["Código IBGE", "Nome_Município", "_metric"]:
         if c in df.columns:
             base_cols.append(c)
 
@@ -210,12 +275,111 @@ def melt_years(df: pd.DataFrame, value_name: str) -> pd.DataFrame:
     )
 
     out.rename(columns={"Código IBGE": "IBGE", "Nome_Município": "Municipio"}, inplace=True)
-    out["IBGE"] = pd.to_numeric(out["IBGE"], errors="coerce").fillna(0).astype(int)
-    out["Ano"] = pd.to_numeric(out["Ano"], errors="coerce").astype(int)
-    out[value_name] = pd.to_numeric(out[value_name], errors="coerce")
+    # IBGE já vem int32 do filtro de municípios e Ano vem dos cabeçalhos (int);
+    # só o valor pode ter texto perdido na planilha
+    if not pd.api.types.is_numeric_dtype(out[value_name]):
+        out[value_name] = pd.to_numeric(out[value_name], errors="coerce")
+
+    # Tipos enxutos: filtros por município comparam códigos inteiros, não strings.
+    # float32 (~7 dígitos) sobra para valores exibidos em R$ milhões com 1 casa.
+    out["Municipio"] = out["Municipio"].astype("category")
+    out["Ano"] = out["Ano"].astype("int16")
+    out[value_name] = out[value_name].astype("float32")
     return out
 
 
+def melt_metrics(wides: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """
+    Empilha as abas anuais (Receita/Despesa/FPM) e faz um único melt_years,
+    separando de volta um DataFrame longo por métrica no final.
+    """
+    wide = pd.concat([df.assign(_metric=name) for name, df in wides.items()], ignore_index=True)
+    long = melt_years(wide, "Valor")
+    # o concat une as colunas de ano das abas: cada métrica fica só com os anos
+    # da própria aba (senão ganha linhas NaN dos anos que só existem nas outras)
+    anos_aba = {
+        name: [c for c in df.columns if isinstance(c, (int, np.integer))] for name, df in wides.items()
+    }
+    return {
+        name: g[g["Ano"].isin(anos_aba[name])]
+        .drop(columns="_metric")
+        .rename(columns={"Valor": name})
+        .reset_index(drop=True)
+        for name, g in long.groupby("_metric", sort=False)
+    }
+
+
+def build_lookup(df_long: pd.DataFrame, value_col: str) -> dict[tuple[str, int], float]:
+    """
+    Índice {(município, ano): valor} montado uma vez no carregamento,
+    para os KPIs não precisarem filtrar o DataFrame a cada clique.
+    """
+    keys = zip(df_long["Municipio"].tolist(), df_long["Ano"].tolist())
+    return dict(zip(keys, df_long[value_col].tolist()))
+
+
+def build_by_muni(df_long: pd.DataFrame, value_col: str) -> dict[str, pd.DataFrame]:
+    """
+    Série de cada município (Ano, <métrica>_mi), já ordenada por ano e em
+    R$ milhões, para não filtrar nem escalar o frame a cada figura.
+    """
+    # uma ordenação só por (Municipio, Ano): cada grupo já sai em ordem de ano
+    df_long = df_long.sort_values(["Municipio", "Ano"], kind="stable")
+    df_long = df_long.assign(**{f"{value_col}_mi": to_mi(df_long[value_col])})
+    return {
+        str(m): g[["Ano", f"{value_col}_mi"]].reset_index(drop=True)
+        for m, g in df_long.groupby("Municipio", sort=False, observed=True)
+    }
+
+
+def build_rd_by_muni(
+    receita: pd.DataFrame, despesa: pd.DataFrame, anos: list[int]
+) -> dict[str, pd.DataFrame]:
+    """
+    Receita e Despesa lado a lado (Ano, Receita_mi, Despesa_mi) por município,
+    em R$ milhões e já alinhadas no eixo fixo de anos — pivot + reindex, sem
+    merge nem sort.
+    Todo município tem o eixo ANOS completo: ano sem valor fica NaN e vira
+    lacuna na linha, como no merge externo.
+    """
+    wide = [
+        df.drop_duplicates(["Municipio", "Ano"])  # linha repetida: fica a primeira
+        .pivot(index="Municipio", columns="Ano", values=col)
+        .reindex(columns=anos)
+        for col, df in (("Receita", receita), ("Despesa", despesa))
+    ]
+    munis = wide[0].index.union(wide[1].index)
+    r, d = (to_mi(w.reindex(munis).to_numpy()) for w in wide)
+    anos_arr = np.asarray(anos, dtype=np.int16)
+    return {
+        str(m): pd.DataFrame({"Ano": anos_arr, "Receita_mi": r[i], "Despesa_mi": d[i]})
+        for i, m in enumerate(munis)
+    }
+
+
+def build_rank_cache(df_long: pd.DataFrame, value_col: str, top_n: int) -> dict[int, dict]:
+    """
+    Pré-calcula, por ano, tudo o que o ranking usa, já como arrays — tira
+    filtro, sort e DataFrame do caminho do clique:
+    - "names" / "values_mi": o ano inteiro em ordem decrescente (R$ milhões);
+    - "top": posições das `top_n` primeiras, já na ordem de exibição (crescente);
+    - "pos": posição de cada município em "names".
+    """
+    cache: dict[int, dict] = {}
+    for ano, dfy in df_long.groupby("Ano", sort=True):
+        dfy = dfy.dropna(subset=[value_col])
+        # sort estável: empates (comuns no FPM) mantêm a ordem da planilha
+        dfy = dfy.sort_values(value_col, ascending=False, kind="stable")
+        names = dfy["Municipio"].astype(str).to_numpy()
+        cache[int(ano)] = {
+            "names": names,
+            "values_mi": to_mi(dfy[value_col]),
+            "top": np.arange(min(top_n, len(names)))[::-1],
+            "pos": {m: i for i, m in enumerate(names.tolist())},
+        }
+    return cache
+
+
 # =========================
 # Load Data
 # =========================
@@ -235,31 +399,147 @@ SHEETS_INDICADOR = {
     "Turismo - Empregos": "Turismo - Empregos",
 }
 
+SHEETS_ANUAIS = ["Receita", "Despesa", "FPM"]
+ALL_SHEETS = list(SHEETS_INDICADOR.values()) + SHEETS_ANUAIS
+
+_raw_sheets: dict[str, pd.DataFrame] = {}
+
+
+# colunas que nenhuma aba usa (nem tabela, nem série)
+SKIP_COLS = {"R. Integ."}
+
+
+def is_used_column(col) -> bool:
+    """Descarta já na leitura do Excel as colunas fantasmas ('Unnamed: N') e as de SKIP_COLS."""
+    if isinstance(col, str):
+        return not col.startswith("Unnamed") and col not in SKIP_COLS
+    return True
+
+
+def read_sheet(sheet: str) -> pd.DataFrame:
+    """
+    Lê uma aba da planilha. Na primeira chamada abre o .xlsx uma única vez e
+    carrega todas as abas de ALL_SHEETS de uma vez (ZIP e shared strings
+    processados uma só vez, em vez de uma vez por aba).
+
+    Usa o engine "calamine" (parser em Rust), bem mais rápido que o openpyxl.
+
+    Não vale paralelizar por aba com threads: o workbook do calamine não pode
+    ser compartilhado entre threads, e reabrir o .xlsx por aba (descompactando
+    o ZIP de novo) saiu mais lento que esta leitura única (~24 ms x ~19 ms).
+    """
+    if not _raw_sheets:
+        _raw_sheets.update(
+            pd.read_excel(XLSX_PATH, sheet_name=ALL_SHEETS, engine="calamine", usecols=is_used_column)
+        )
+    return _raw_sheets[sheet]
+
+
+def _cached_sheet(sheet: str, build):
+    """
+    Devolve a aba (ou o conjunto de abas) já tratada a partir de CACHE_DIR quando a planilha não mudou
+    (mesmo caminho, mtime e tamanho) nem as versões de pandas/numpy; senão roda `build()` e grava o
+    resultado.
+    """
+    st = XLSX_PATH.stat()
+    key = (CACHE_VERSION, pd.__version__, np.__version__, str(XLSX_PATH), st.st_mtime_ns, st.st_size, sheet)
+    path = CACHE_DIR / f"{sheet}.pkl"
+
+    try:
+        cached_key, df = pd.read_pickle(path)
+        if cached_key == key:
+            return df
+    except Exception:
+        pass  # cache ausente/corrompido/de outra versão: vale como miss e é regravado
+
+    df = build()
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        pd.to_pickle((key, df), path)
+    except OSError:
+        pass  # sem permissão de escrita: segue sem cache
+    return df
+
+
+def load_indicador_sheet(sheet: str) -> pd.DataFrame:
+    df = only_municipios_from_indicador_sheet(read_sheet(sheet))
+    df.rename(columns={"Código IBGE": "IBGE", "Indicador": "Municipio"}, inplace=True)
+    return df
+
+
 dfs_kv: dict[str, pd.DataFrame] = {}
 for label, sheet in SHEETS_INDICADOR.items():
-    df = pd.read_excel(XLSX_PATH, sheet_name=sheet)
-    df = only_municipios_from_indicador_sheet(df)
-    df.rename(columns={"Código IBGE": "IBGE", "Indicador": "Municipio"}, inplace=True)
-    dfs_kv[label] = df
+    dfs_kv[label] = _cached_sheet(sheet, lambda sheet=sheet: load_indicador_sheet(sheet))
 
-df_receita_wide = pd.read_excel(XLSX_PATH, sheet_name="Receita")
-df_despesa_wide = pd.read_excel(XLSX_PATH, sheet_name="Despesa")
-df_fpm_wide = pd.read_excel(XLSX_PATH, sheet_name="FPM")
+# abas de indicadores já formatadas (texto) e indexadas por município
+dfs_kv_fmt = {label: index_by_municipio(format_sheet(df), "Municipio") for label, df in dfs_kv.items()}
 
-receita_long = melt_years(df_receita_wide, "Receita")
-despesa_long = melt_years(df_despesa_wide, "Despesa")
-fpm_long = melt_years(df_fpm_wide, "FPM")
+# tabelas prontas por (aba, município): o callback vira só uma consulta ao dict
+KV_CACHE: dict[tuple[str, str], list[dict]] = {
+    (label, nome): records
+    for label, df_fmt in dfs_kv_fmt.items()
+    for nome, records in build_kv_records(df_fmt).items()
+}
 
-MUNICIPIOS = sorted(receita_long["Municipio"].dropna().unique().tolist())
+dfs_long = _cached_sheet(
+    "Financeiro", lambda: melt_metrics({sheet: read_sheet(sheet) for sheet in SHEETS_ANUAIS})
+)
+receita_long = dfs_long["Receita"]
+despesa_long = dfs_long["Despesa"]
+fpm_long = dfs_long["FPM"]
+_raw_sheets.clear()  # abas brutas não são mais necessárias
+
+RECEITA_LOOKUP = build_lookup(receita_long, "Receita")
+DESPESA_LOOKUP = build_lookup(despesa_long, "Despesa")
+FPM_LOOKUP = build_lookup(fpm_long, "FPM")
+
+RECEITA_BY_MUNI = build_by_muni(receita_long, "Receita")
+DESPESA_BY_MUNI = build_by_muni(despesa_long, "Despesa")
+FPM_BY_MUNI = build_by_muni(fpm_long, "FPM")
+
+# rankings prontos por (métrica, ano)
+RANK_TOP_N = 20
+RANK_CACHE: dict[tuple[str, int], dict] = {
+    (metric, ano): entry
+    for metric, df in dfs_long.items()
+    for ano, entry in build_rank_cache(df, metric, RANK_TOP_N).items()
+}
+
+# só os presentes em Receita: as categorias são a união das três abas (melt único)
+MUNICIPIOS = sorted(receita_long["Municipio"].unique().tolist())
 ANOS = sorted(receita_long["Ano"].dropna().unique().tolist())
 DEFAULT_MUNI = MUNICIPIOS[0] if MUNICIPIOS else None
 DEFAULT_ANO = max(ANOS) if ANOS else None
 
+RD_BY_MUNI = build_rd_by_muni(receita_long, despesa_long, ANOS)
+RD_EMPTY = pd.DataFrame({"Ano": [], "Receita_mi": [], "Despesa_mi": []})
+
+# opções dos dropdowns (estáticas)
+MUNI_OPTIONS = [{"label": m, "value": m} for m in MUNICIPIOS]
+YEAR_OPTIONS = [{"label": str(display_year(a)), "value": a} for a in ANOS]
+
+# Eixo x das séries: elimina frações de ano e mostra o ANO EXIBIDO (ano real
+# + YEAR_OFFSET) sem explicitar isso na UI. Não depende do município.
+ANOS_EXIB = np.asarray(ANOS, dtype=np.int32) + YEAR_OFFSET
+YEAR_XAXIS = dict(
+    tickmode="array",
+    tickvals=ANOS,
+    ticktext=ANOS_EXIB.astype(str).tolist(),
+    dtick=1,
+    type="linear",
+    title="",
+)
+
 
 # =========================
 # UI Components
 # =========================
-def make_kv_table_component(table_id: str, title: str) -> html.Div:
+def kv_records(sheet_label: str, municipio: str) -> list[dict]:
+    # município ausente na aba (ou None) -> linha fixa de "não encontrado"
+    return KV_CACHE.get((sheet_label, municipio), KV_NOT_FOUND)
+
+
+def make_kv_table_component(sheet_label: str, title: str, municipio: str | None) -> html.Div:
     return html.Div(
         className="block-card",
         children=[
@@ -268,12 +548,14 @@ def make_kv_table_component(table_id: str, title: str) -> html.Div:
                 children=[html.Div(title, className="block-title")],
             ),
             dash_table.DataTable(
-                id=table_id,
+                # id por padrão (pattern-matching): um único callback preenche todas
+                id={"type": "kv_table", "sheet": sheet_label},
                 columns=[
                     {"name": "Indicador", "id": "Indicador"},
                     {"name": "Valor", "id": "Valor"},
                 ],
-                data=[],
+                # já nasce com o município da montagem (o callback só roda em mudanças)
+                data=kv_records(sheet_label, municipio),
                 page_size=18,
                 style_table={"overflowX": "auto"},
                 style_cell={
@@ -309,104 +591,186 @@ def make_kv_table_component(table_id: str, title: str) -> html.Div:
     )
 
 
-def ranking_fig(df_long: pd.DataFrame, value_col: str, ano: int, municipio: str, top_n: int = 20):
-    if ano is None or municipio is None:
-        fig = px.bar(title="—")
-        fig.update_layout(height=420)
-        return fig
-
-    dfy = df_long[df_long["Ano"] == ano].copy()
-    dfy = dfy.dropna(subset=[value_col])
-    dfy = dfy.sort_values(value_col, ascending=False)
-
-    top = dfy.head(top_n).copy()
+# Hover fixo das figuras financeiras (o nome da série vem do próprio trace)
+RANK_HOVER = "%{y}<br>R$ %{x:,.1f}<extra></extra>"
+SERIES_HOVER = "%{fullData.name}<br>Ano: %{customdata}<br>R$ %{y:,.1f}<extra></extra>"
+
+# Layout fixo dos rankings, montado uma vez; cada figura só recebe o trace
+RANKING_LAYOUT = go.Layout(
+    margin=dict(l=10, r=10, t=40, b=10),
+    height=520,
+    showlegend=False,
+    # ✅ garante que qualquer título fique central (quando for setado depois)
+    title_x=0.5,
+    title_xanchor="center",
+    xaxis=dict(title="R$ milhões", tickformat=",.0f"),
+    yaxis=dict(showgrid=False, title=""),
+)
 
-    sel = dfy[dfy["Municipio"] == municipio]
-    if not sel.empty and municipio not in top["Municipio"].values:
-        top = pd.concat([top, sel.iloc[[0]]], ignore_index=True)
 
-    top["_sel"] = np.where(top["Municipio"] == municipio, "Selecionado", "Outros")
-    top = top.sort_values(value_col, ascending=True)
+def ranking_fig(entry: dict | None, municipio: str):
+    """`entry` é RANK_CACHE[(métrica, ano)] (None se o ano não existir)."""
+    if entry is None or municipio is None:
+        # mesmo layout das figuras com dados: o callback pode trocar só os traces
+        return go.Figure(layout=RANKING_LAYOUT)
+
+    # Top N pronto; o selecionado, se estiver fora, entra como a menor barra
+    rows = entry["top"]
+    sel_pos = entry["pos"].get(municipio, -1)
+    if sel_pos >= len(rows):
+        rows = np.concatenate(([sel_pos], rows))
+
+    # Um único trace (cor por barra): mantém as barras na ordem do valor
+    fig = go.Figure(
+        go.Bar(
+            x=entry["values_mi"][rows],
+            y=entry["names"][rows],
+            orientation="h",
+            marker_color=np.where(rows == sel_pos, BRAND_RED, BRAND_BLUE),
+            hovertemplate=RANK_HOVER,
+        ),
+        layout=RANKING_LAYOUT,
+    )
+    return fig
 
-    top["_value_mi"] = pd.to_numeric(top[value_col], errors="coerce") / MONEY_SCALE
 
-    fig = px.bar(
-        top,
-        x="_value_mi",
-        y="Municipio",
-        orientation="h",
-        color="_sel",
-        color_discrete_map={"Selecionado": BRAND_RED, "Outros": BRAND_BLUE},
-        title="",
+def series_fig_money_mi(by_muni: dict[str, pd.DataFrame], value_col: str, municipio: str):
+    """Série em R$ milhões, sem título (quem usa define o título do card)."""
+    d = by_muni.get(municipio)  # já ordenado por ano
+    if d is None:
+        return go.Figure(layout=dict(title="—", height=360))
+
+    fig = go.Figure(
+        go.Scatter(
+            x=d["Ano"].to_numpy(),
+            y=d[f"{value_col}_mi"].to_numpy(),
+            name=value_col,
+            showlegend=False,
+            customdata=d["Ano"].to_numpy() + YEAR_OFFSET,
+            hovertemplate=SERIES_HOVER,
+        ),
+        layout=dict(height=360, xaxis=YEAR_XAXIS, yaxis_title="R$ milhões"),
     )
+    return fig
 
-    fig.update_traces(hovertemplate="%{y}<br>R$ %{x:,.1f}<extra></extra>")
-
-    fig.update_layout(
-        margin=dict(l=10, r=10, t=40, b=10),
-        height=520,
-        showlegend=False,
-        template="plotly_white",
-        paper_bgcolor=BRAND_CARD,
-        plot_bgcolor=BRAND_CARD,
-        separators=".,",
-        font=dict(
-            family="system-ui, -apple-system, Segoe UI, Roboto, Ubuntu, Cantarell, Noto Sans, Arial",
-            color=BRAND_TEXT,
+
+def rd_fig(municipio: str) -> go.Figure:
+    """Receita vs Despesa (R$ milhões); cores pela colorway do template."""
+    dd = RD_BY_MUNI.get(municipio, RD_EMPTY)  # pré-montado na carga
+    anos_rd = dd["Ano"].to_numpy()
+    ano_exib_rd = anos_rd + YEAR_OFFSET
+
+    fig = go.Figure(
+        [
+            go.Scatter(
+                x=anos_rd,
+                y=dd[f"{col}_mi"].to_numpy(),
+                name=col,
+                customdata=ano_exib_rd,
+                hovertemplate=SERIES_HOVER,
+            )
+            for col in ("Receita", "Despesa")
+        ],
+        layout=dict(
+            title="Série histórica — Receita vs Despesa<br><sup>Valores em R$ milhões</sup>",
+            height=420,
+            xaxis=YEAR_XAXIS,
+            yaxis=dict(title=""),
         ),
-        # ✅ garante que qualquer título fique central (quando for setado depois)
-        title_x=0.5,
-        title_xanchor="center",
     )
-    fig.update_xaxes(
-        showgrid=True,
-        gridcolor=BRAND_BORDER,
-        zeroline=False,
-        title="R$ milhões",
-        tickformat=",.0f",
-    )
-    fig.update_yaxes(showgrid=False, title="")
     return fig
 
 
-def series_fig_money_mi(df_long: pd.DataFrame, value_col: str, municipio: str, title: str):
-    if municipio is None:
-        fig = px.line(title="—")
-        fig.update_layout(height=360)
-        return fig
+# Memoização das figuras: entradas são (métrica, ano/município), e o cache
+# guarda o JSON final da figura (já com altura/título do card), que o callback
+# devolve direto — sem reconstruir/validar um go.Figure a cada clique.
+# O Dash só serializa a saída, então o dict compartilhado não é alterado.
+def fig_json(fig: go.Figure) -> dict:
+    """
+    Figura já em tipos JSON puros (listas/float, sem ndarray): serializada uma
+    vez no cache, a resposta do Dash não passa mais pelo fallback de numpy do
+    encoder a cada clique (~25% a menos no to_json das figuras).
+    """
+    return json.loads(fig.to_json())
 
-    d = df_long[df_long["Municipio"] == municipio].copy()
-    d = d.sort_values("Ano")
-    d["_value_mi"] = pd.to_numeric(d[value_col], errors="coerce") / MONEY_SCALE
-    d["_ano_exib"] = d["Ano"].apply(display_year).astype(int)
 
-    fig = px.line(d, x="Ano", y="_value_mi", markers=True, title=title)
-    fig.update_layout(margin=dict(l=10, r=10, t=70, b=10), height=360)
+SERIES_BY_MUNI = {
+    "Receita": RECEITA_BY_MUNI,
+    "Despesa": DESPESA_BY_MUNI,
+    "FPM": FPM_BY_MUNI,
+}
 
-    fig.update_traces(
-        name=value_col,
-        line=dict(width=3, color=BRAND_BLUE),
-        marker=dict(size=8, color=BRAND_BLUE),
-        customdata=d["_ano_exib"],
-        hovertemplate=f"{value_col}<br>Ano: %{{customdata}}<br>R$ %{{y:,.1f}}<extra></extra>",
-    )
 
-    apply_year_ticks(fig, ANOS, axis_title="")
-    fig.update_yaxes(title="R$ milhões", tickformat=",.0f")
-    fig.update_layout(legend_title_text="")
-    return fig
+def ranking_layout(value_col: str, height: int = 420) -> dict:
+    return dict(height=height, title=dict(text=value_col, x=0.5, xanchor="center"))
 
 
-def get_value(df_long: pd.DataFrame, value_col: str, municipio: str, ano: int) -> float | None:
-    d = df_long[(df_long["Municipio"] == municipio) & (df_long["Ano"] == ano)]
-    if d.empty:
-        return None
-    v = d.iloc[0][value_col]
+@lru_cache(maxsize=4096)
+def cached_ranking_fig(value_col: str, ano: int, municipio: str, height: int = 420) -> dict:
+    fig = ranking_fig(RANK_CACHE.get((value_col, ano)), municipio)
+    fig.update_layout(**ranking_layout(value_col, height))
+    return fig_json(fig)
+
+
+def ranking_shell(value_col: str) -> dict:
+    """
+    Figura inicial do ranking no layout (sem traces): o gráfico nunca fica sem
+    `figure`, então o callback pode mandar só o Patch dos dados desde a carga.
+    """
+    return fig_json(go.Figure(layout=RANKING_LAYOUT).update_layout(**ranking_layout(value_col)))
+
+
+@lru_cache(maxsize=4096)
+def _series_fig_base(value_col: str, municipio: str) -> dict:
+    return fig_json(series_fig_money_mi(SERIES_BY_MUNI[value_col], value_col, municipio))
+
+
+def cached_series_fig(value_col: str, municipio: str, title: str, height: int = 360) -> dict:
+    """
+    A série é montada uma vez por (métrica, município) e reaproveitada pelos
+    cards que a repetem (o FPM aparece em dois); aqui só entram título e altura,
+    numa cópia rasa do layout.
+    """
+    base = _series_fig_base(value_col, municipio)
+    layout = {**base["layout"], "height": height}
+    if base["data"]:  # a figura vazia mantém o título "—"
+        layout["title"] = {"text": title}
+    return {**base, "layout": layout}
+
+
+@lru_cache(maxsize=4096)
+def cached_rd_fig(municipio: str) -> dict:
+    return fig_json(rd_fig(municipio))
+
+
+def get_value(lookup: dict[tuple[str, int], float], municipio: str, ano: int) -> float | None:
+    v = lookup.get((municipio, ano))
     if v is None or (isinstance(v, float) and np.isnan(v)):
         return None
     return float(v)
 
 
+def kpi_texts(municipio: str, ano: int) -> list[str]:
+    """Textos dos cards (Receita, Despesa, FPM, Saldo) em R$ milhões."""
+    r = get_value(RECEITA_LOOKUP, municipio, ano)
+    d = get_value(DESPESA_LOOKUP, municipio, ano)
+    f = get_value(FPM_LOOKUP, municipio, ano)
+
+    r_mi = None if r is None else (r / MONEY_SCALE)
+    d_mi = None if d is None else (d / MONEY_SCALE)
+    f_mi = None if f is None else (f / MONEY_SCALE)
+
+    saldo = None if (r is None or d is None) else (r - d)
+    saldo_mi = None if saldo is None else (saldo / MONEY_SCALE)
+
+    return [format_number_mi(v, decimals=1) for v in (r_mi, d_mi, f_mi, saldo_mi)]
+
+
+# Cards já formatados para todo (município, ano): vão para o navegador num
+# dcc.Store e um callback clientside só escolhe a linha — sem ida ao servidor.
+KPI_TEXTS = {m: {a: kpi_texts(m, a) for a in ANOS} for m in MUNICIPIOS}
+
+
 # =========================
 # App
 # =========================
@@ -655,7 +1019,7 @@ sidebar = dbc.Card(
                         html.Div(className="side-label", children=[html.I(className="bi bi-geo-alt-fill me-2"), "Município"]),
                         dcc.Dropdown(
                             id="municipio",
-                            options=[{"label": m, "value": m} for m in MUNICIPIOS],
+                            options=MUNI_OPTIONS,
                             value=DEFAULT_MUNI,
                             clearable=False,
                             searchable=True,
@@ -673,15 +1037,21 @@ sidebar = dbc.Card(
 def year_dropdown(id_, value):
     return dcc.Dropdown(
         id=id_,
-        options=[{"label": str(display_year(a)), "value": a} for a in ANOS],
+        options=YEAR_OPTIONS,
         value=value,
         clearable=False,
     )
 
 
-def wrap_graph(graph_id: str, height: int | None = None):
-    g = dcc.Graph(id=graph_id, style={"height": f"{height}px"} if height else {})
-    return dbc.Spinner(html.Div(g), color="primary", delay_show=150)
+def wrap_graph(graph_id: str, height: int | None = None, figure: dict | None = None):
+    # animate=False: cada resposta é um Plotly.react direto, sem transição.
+    # Os traces continuam SVG (scatter/bar): com 5 pontos por série e 21 barras,
+    # um contexto WebGL por gráfico (são 8 na aba) custaria mais que o SVG.
+    g = dcc.Graph(id=graph_id, animate=False, style={"height": f"{height}px"} if height else {})
+    if figure is not None:
+        g.figure = figure
+    # um Loading por gráfico: cada bloco aparece assim que o seu callback responde
+    return dcc.Loading(g, type="circle", color=BRAND_BLUE, delay_show=150)
 
 
 # =========================
@@ -760,9 +1130,9 @@ tabs = dcc.Tabs(
                         ]),
                         dbc.Row(
                             [
-                                dbc.Col(wrap_graph("fig_rank_receita_resumo"), md=4),
-                                dbc.Col(wrap_graph("fig_rank_despesa_resumo"), md=4),
-                                dbc.Col(wrap_graph("fig_rank_fpm_resumo"), md=4),
+                                dbc.Col(wrap_graph("fig_rank_receita_resumo", figure=ranking_shell("Receita")), md=4),
+                                dbc.Col(wrap_graph("fig_rank_despesa_resumo", figure=ranking_shell("Despesa")), md=4),
+                                dbc.Col(wrap_graph("fig_rank_fpm_resumo", figure=ranking_shell("FPM")), md=4),
                             ],
                             className="g-2",
                         ),
@@ -794,68 +1164,83 @@ tabs = dcc.Tabs(
         ),
 
         dcc.Tab(
+            id="sintese_municipal",
             label="Síntese Municipal",
             value="sintese_municipal",
             className="custom-tab",
             selected_className="custom-tab custom-tab--selected",
-            children=[
-                html.Br(),
-                make_kv_table_component("table_geral", "Geral (por município)"),
-            ],
         ),
 
         dcc.Tab(
+            id="sintese_economica",
             label="Síntese Econômica",
             value="sintese_economica",
             className="custom-tab",
             selected_className="custom-tab custom-tab--selected",
-            children=[
-                html.Br(),
-                dbc.Row(
-                    [
-                        dbc.Col(make_kv_table_component("table_eco1", "Economia 01 (por município)"), md=6),
-                        dbc.Col(make_kv_table_component("table_eco2", "Economia 02 (por município)"), md=6),
-                    ],
-                    className="g-2",
-                ),
-            ],
         ),
 
         dcc.Tab(
+            id="infraestrutura",
             label="Infraestrutura",
             value="infraestrutura",
             className="custom-tab",
             selected_className="custom-tab custom-tab--selected",
-            children=[
-                html.Br(),
-                make_kv_table_component("table_inf1", "Infraest. 01 (por município)"),
-            ],
         ),
 
         dcc.Tab(
+            id="turismo",
             label="Turismo",
             value="turismo",
             className="custom-tab",
             selected_className="custom-tab custom-tab--selected",
-            children=[
-                html.Br(),
-                dbc.Row(
-                    [
-                        dbc.Col(make_kv_table_component("table_tur1", "Turismo — Empreendimentos (por município)"), md=6),
-                        dbc.Col(make_kv_table_component("table_tur2", "Turismo — Empregos (por município)"), md=6),
-                    ],
-                    className="g-2",
-                ),
-            ],
         ),
     ],
 )
 
+
+# Abas de indicadores montadas sob demanda (callback render_tab): o layout
+# inicial só leva "Contas Públicas", e as tabelas nascem ao abrir a aba.
+# Município fora da lista vira None (tabelas "não encontrado"), então o cache
+# fica limitado a abas x municípios, e não a qualquer texto vindo do cliente.
+MUNICIPIOS_SET = frozenset(MUNICIPIOS)
+
+
+@lru_cache(maxsize=4096)
+def tab_children(tab: str, municipio: str | None) -> list:
+    def pair(a: tuple[str, str], b: tuple[str, str]):
+        return dbc.Row(
+            [
+                dbc.Col(make_kv_table_component(*a, municipio), md=6),
+                dbc.Col(make_kv_table_component(*b, municipio), md=6),
+            ],
+            className="g-2",
+        )
+
+    if tab == "sintese_municipal":
+        body = make_kv_table_component("Geral", "Geral (por município)", municipio)
+    elif tab == "sintese_economica":
+        body = pair(
+            ("Economia 01", "Economia 01 (por município)"),
+            ("Economia 02", "Economia 02 (por município)"),
+        )
+    elif tab == "infraestrutura":
+        body = make_kv_table_component("Infraest. 01", "Infraest. 01 (por município)", municipio)
+    else:  # turismo
+        body = pair(
+            ("Turismo - Empreendimentos", "Turismo — Empreendimentos (por município)"),
+            ("Turismo - Empregos", "Turismo — Empregos (por município)"),
+        )
+    return [html.Br(), body]
+
+
+LAZY_TABS = ("sintese_municipal", "sintese_economica", "infraestrutura", "turismo")
+
 app.layout = dbc.Container(
     fluid=True,
     children=[
         html.Br(),
         topbar,
+        dcc.Store(id="kpi_store", data=KPI_TEXTS),
         html.Div(
             className="shell",
             children=[
@@ -876,165 +1261,104 @@ app.layout = dbc.Container(
 # =========================
 # Callbacks
 # =========================
-@app.callback(
+app.clientside_callback(
+    """
+    function (municipio, ano, kpis) {
+        const row = ((kpis || {})[municipio] || {})[ano];
+        return row || ["—", "—", "—", "—"];
+    }
+    """,
     Output("card_receita", "children"),
     Output("card_despesa", "children"),
     Output("card_fpm", "children"),
     Output("card_saldo", "children"),
+    Input("municipio", "value"),
+    Input("ano_resumo", "value"),
+    State("kpi_store", "data"),
+)
+
+
+# Séries dependem só do município e rankings de (ano, município — destaque):
+# trocar o ano não refaz nenhuma série.
+@app.callback(
     Output("fig_receita_vs_despesa", "figure"),
     Output("fig_fpm_series", "figure"),
-    Output("fig_rank_receita_resumo", "figure"),
-    Output("fig_rank_despesa_resumo", "figure"),
-    Output("fig_rank_fpm_resumo", "figure"),
     Output("fig_series_receita_resumo", "figure"),
     Output("fig_series_despesa_resumo", "figure"),
     Output("fig_series_fpm_resumo", "figure"),
     Input("municipio", "value"),
-    Input("ano_resumo", "value"),
 )
-def update_contas_publicas(municipio: str, ano: int):
-    r = get_value(receita_long, "Receita", municipio, ano)
-    d = get_value(despesa_long, "Despesa", municipio, ano)
-    f = get_value(fpm_long, "FPM", municipio, ano)
+def update_series(municipio: str):
+    fig_rd = cached_rd_fig(municipio)
 
-    r_mi = None if r is None else (r / MONEY_SCALE)
-    d_mi = None if d is None else (d / MONEY_SCALE)
-    f_mi = None if f is None else (f / MONEY_SCALE)
-
-    r_txt = format_number_mi(r_mi, decimals=1)
-    d_txt = format_number_mi(d_mi, decimals=1)
-    f_txt = format_number_mi(f_mi, decimals=1)
-
-    saldo = None if (r is None or d is None) else (r - d)
-    saldo_mi = None if saldo is None else (saldo / MONEY_SCALE)
-    s_txt = format_number_mi(saldo_mi, decimals=1)
-
-    dd = pd.merge(
-        receita_long[receita_long["Municipio"] == municipio][["Ano", "Receita"]],
-        despesa_long[despesa_long["Municipio"] == municipio][["Ano", "Despesa"]],
-        on="Ano",
-        how="outer",
-    ).sort_values("Ano")
-
-    dd["Receita_mi"] = pd.to_numeric(dd["Receita"], errors="coerce") / MONEY_SCALE
-    dd["Despesa_mi"] = pd.to_numeric(dd["Despesa"], errors="coerce") / MONEY_SCALE
-    dd["_ano_exib"] = dd["Ano"].apply(display_year).astype(int)
-
-    fig_rd = px.line(
-        dd,
-        x="Ano",
-        y=["Receita_mi", "Despesa_mi"],
-        markers=True,
-        title="Série histórica — Receita vs Despesa<br><sup>Valores em R$ milhões</sup>",
-    )
-    fig_rd.update_layout(margin=dict(l=10, r=10, t=70, b=10), height=420, separators=".,")
-    fig_rd.update_layout(legend_title_text="")
-    fig_rd.update_yaxes(title="", tickformat=",.0f")
-    fig_rd.update_xaxes(title="")
-
-    for tr in fig_rd.data:
-        if tr.name == "Receita_mi":
-            tr.name = "Receita"
-            tr.line.color = BRAND_BLUE
-            tr.marker.color = BRAND_BLUE
-        elif tr.name == "Despesa_mi":
-            tr.name = "Despesa"
-            tr.line.color = BRAND_RED
-            tr.marker.color = BRAND_RED
-        tr.line.width = 3
-        tr.marker.size = 8
-        tr.customdata = dd["_ano_exib"]
-        tr.hovertemplate = "%{fullData.name}<br>Ano: %{customdata}<br>R$ %{y:,.1f}<extra></extra>"
-
-    apply_year_ticks(fig_rd, ANOS, axis_title="")
-
-    fig_f_big = series_fig_money_mi(
-        fpm_long,
+    fig_f_big = cached_series_fig(
         "FPM",
         municipio,
         "Série histórica — FPM<br><sup>Valores em R$ milhões</sup>",
-    )
-    fig_f_big.update_layout(height=420)
-
-    fig_rank_r = ranking_fig(receita_long, "Receita", ano, municipio, top_n=20)
-    fig_rank_r.update_layout(
         height=420,
-        title=dict(text="Receita", x=0.5, xanchor="center"),
     )
 
-    fig_rank_d = ranking_fig(despesa_long, "Despesa", ano, municipio, top_n=20)
-    fig_rank_d.update_layout(
-        height=420,
-        title=dict(text="Despesa", x=0.5, xanchor="center"),
-    )
-
-    fig_rank_f = ranking_fig(fpm_long, "FPM", ano, municipio, top_n=20)
-    fig_rank_f.update_layout(
-        height=420,
-        title=dict(text="FPM", x=0.5, xanchor="center"),
-    )
-
-    fig_sr = series_fig_money_mi(
-        receita_long,
+    fig_sr = cached_series_fig(
         "Receita",
         municipio,
         "Receita — Série histórica<br><sup>Valores em R$ milhões</sup>",
     )
-    fig_sd = series_fig_money_mi(
-        despesa_long,
+    fig_sd = cached_series_fig(
         "Despesa",
         municipio,
         "Despesa — Série histórica<br><sup>Valores em R$ milhões</sup>",
     )
-    fig_sf = series_fig_money_mi(
-        fpm_long,
+    fig_sf = cached_series_fig(
         "FPM",
         municipio,
         "FPM — Série histórica<br><sup>Valores em R$ milhões</sup>",
     )
 
-    return (
-        r_txt, d_txt, f_txt, s_txt,
-        fig_rd, fig_f_big,
-        fig_rank_r, fig_rank_d, fig_rank_f,
-        fig_sr, fig_sd, fig_sf,
-    )
-
-
-def _update_kv_table(sheet_label: str, municipio: str):
-    df = dfs_kv[sheet_label]
-    kv = wide_to_kv(df, municipio, "Municipio")
-    return kv.to_dict("records")
-
-
-@app.callback(Output("table_geral", "data"), Input("municipio", "value"))
-def update_table_geral(municipio: str):
-    return _update_kv_table("Geral", municipio)
-
-
-@app.callback(Output("table_eco1", "data"), Input("municipio", "value"))
-def update_table_eco1(municipio: str):
-    return _update_kv_table("Economia 01", municipio)
-
-
-@app.callback(Output("table_eco2", "data"), Input("municipio", "value"))
-def update_table_eco2(municipio: str):
-    return _update_kv_table("Economia 02", municipio)
+    return fig_rd, fig_f_big, fig_sr, fig_sd, fig_sf
 
 
-@app.callback(Output("table_inf1", "data"), Input("municipio", "value"))
-def update_table_inf1(municipio: str):
-    return _update_kv_table("Infraest. 01", municipio)
+@app.callback(
+    Output("fig_rank_receita_resumo", "figure"),
+    Output("fig_rank_despesa_resumo", "figure"),
+    Output("fig_rank_fpm_resumo", "figure"),
+    Input("municipio", "value"),
+    Input("ano_resumo", "value"),
+)
+def update_rankings(municipio: str, ano: int):
+    # O layout de cada ranking não muda com ano/município (template, eixos,
+    # título) e já vem no layout da página (ranking_shell): só os traces vão
+    # para o navegador, inclusive na carga.
+    patches = []
+    for metric in ("Receita", "Despesa", "FPM"):
+        p = Patch()
+        p["data"] = cached_ranking_fig(metric, ano, municipio)["data"]
+        patches.append(p)
+    return patches
 
 
-@app.callback(Output("table_tur1", "data"), Input("municipio", "value"))
-def update_table_tur1(municipio: str):
-    return _update_kv_table("Turismo - Empreendimentos", municipio)
+@app.callback(
+    [Output(tab, "children") for tab in LAZY_TABS],
+    Input("tabs", "value"),
+    Input("municipio", "value"),
+    prevent_initial_call=True,
+)
+def render_tab(tab: str, municipio: str):
+    # município como Input (não State): uma resposta atrasada da aba nunca
+    # monta tabelas de um município que já não está selecionado
+    if ctx.triggered_id == "municipio" and tab not in LAZY_TABS:
+        return [no_update] * len(LAZY_TABS)
+    # só a aba aberta tem conteúdo; as demais voltam a ficar vazias
+    municipio = municipio if municipio in MUNICIPIOS_SET else None
+    return [tab_children(t, municipio) if t == tab else [] for t in LAZY_TABS]
 
 
-@app.callback(Output("table_tur2", "data"), Input("municipio", "value"))
-def update_table_tur2(municipio: str):
-    return _update_kv_table("Turismo - Empregos", municipio)
+@app.callback(
+    Output({"type": "kv_table", "sheet": ALL}, "data"),
+    Input("municipio", "value"),
+    prevent_initial_call=True,
+)
+def update_kv_tables(municipio: str):
+    return [kv_records(out["id"]["sheet"], municipio) for out in ctx.outputs_list]
 
 
 if __name__ == "__main__":